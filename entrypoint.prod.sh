@@ -2,5 +2,6 @@
 
 python manage.py collectstatic --noinput
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 gunicorn --bind 0.0.0.0:8000 --workers 3 api.wsgi:application
\ No newline at end of file
@@ -6,22 +6,127 @@ from quran.models import (
     Word,
     Translation,
     AyahTranslation,
+    RecitationSurah,
+    RecitationSurahTimestamp,
 )
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import connection, transaction
 from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from urllib3.util.retry import Retry
+import io
+import hashlib
+from collections import defaultdict, deque
+from itertools import islice
+from datetime import time
+from contextlib import contextmanager
 
 from core.models import Notification
 
+# Namespace for the advisory lock keys taken by the timestamps task
+TIMESTAMPS_LOCK_NAMESPACE = "quran.recitation_surah_timestamps"
+
+# Shared HTTP session so calls to the forced alignment API reuse connections,
+# retrying briefly when the gateway could not reach the service. Read errors
+# and 504s are not retried: upstream may still be aligning the first request.
+_retry = Retry(total=3, read=0, backoff_factor=0.5, status_forcelist=(502, 503), allowed_methods=("POST",))
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=_retry))
+_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=_retry))
+
+def _bulk_create_iter(model, objs):
+    """bulk_create from an iterable while holding at most one batch of instances.
+
+    QuerySet.bulk_create() turns its argument into a list up front, so it is
+    fed one QURAN_BULK_BATCH_SIZE slice of the iterable at a time instead.
+    """
+    batch_size = settings.QURAN_BULK_BATCH_SIZE
+    objs = iter(objs)
+    while batch := list(islice(objs, batch_size)):
+        model.objects.bulk_create(batch, batch_size=batch_size)
+
+def _iter_ayahs(quran_data, surahs_by_number, uid):
+    for surah_data in quran_data["surahs"]:
+        surah = surahs_by_number[surah_data["number"]]
+        for ayah in surah_data["ayahs"]:
+            # Calculate length from words if available: the length of the
+            # space-joined text, without building the joined string
+            words = ayah.get("words")
+            length = (sum(len(word["text"]) for word in words) + len(words) - 1) if words else 0
+
+            yield Ayah(
+                creator_id=uid,
+                surah=surah,
+                number=ayah["number"],
+                sajdah=ayah["sajdah"],
+                is_bismillah=ayah["is_bismillah"],
+                bismillah_text=ayah["bismillah_text"],
+                length=length,
+            )
+
+def _iter_words(quran_data, ayah_id_by_sn, uid):
+    for surah_data in quran_data["surahs"]:
+        surah_number = surah_data["number"]
+        for ayah in surah_data["ayahs"]:
+            ayah_id = ayah_id_by_sn[(surah_number, ayah["number"])]
+            for word in ayah["words"]:
+                yield Word(ayah_id=ayah_id, text=word["text"], creator_id=uid)
+
+def _iter_ayah_translations(translation_data, ayah_lookup, translation_id, uid):
+    # Root-level bismillah text (if provided) – used as default for all ayahs
+    default_bismillah = translation_data.get("bismillah_text")
+
+    for surah_data in translation_data["surahs"]:
+        surah_number = surah_data["number"]
+        for ayah_data in surah_data["ayah_translations"]:
+            ayah_number = ayah_data["number"]
+            ayah_id = ayah_lookup.get((surah_number, ayah_number))
+            if ayah_id is None:
+                # Skip if corresponding ayah not found (data mismatch)
+                continue
+            yield AyahTranslation(
+                creator_id=uid,
+                translation_id=translation_id,
+                ayah_id=ayah_id,
+                text=ayah_data["text"],
+                bismillah=ayah_data.get("bismillah_text") or default_bismillah,
+            )
+
+def _copy_escape(value):
+    """Escape a value for PostgreSQL COPY text format."""
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _copy_words(words):
+    """Insert Word instances with PostgreSQL COPY FROM STDIN.
+
+    Like _bulk_create_iter, one COPY is sent per QURAN_BULK_BATCH_SIZE slice
+    so only a single batch is buffered at a time.
+    """
+    batch_size = settings.QURAN_BULK_BATCH_SIZE
+    now = timezone.now().isoformat()
+    sql = f"COPY {Word._meta.db_table} (uuid, creator_id, ayah_id, text, created_at, updated_at) FROM STDIN WITH (FORMAT text)"
+    words = iter(words)
+    with connection.cursor() as cursor:
+        while batch := list(islice(words, batch_size)):
+            buf = io.StringIO("".join(
+                f"{word.uuid}\t{word.creator_id}\t{word.ayah_id}\t{_copy_escape(word.text)}\t{now}\t{now}\n"
+                for word in batch
+            ))
+            cursor.copy_expert(sql, buf)
+
 @shared_task
 def import_mushaf_task(quran_data, user_id):
     User = get_user_model()
     user = User.objects.get(id=user_id)
     mushaf_data = quran_data["mushaf"]
     with transaction.atomic():
+        uid = user.id
         mushaf = Mushaf.objects.create(
-            creator_id=user.id,
+            creator_id=uid,
             name=mushaf_data["name"],
             short_name=mushaf_data["short_name"],
             source=mushaf_data["source"]
@@ -29,42 +134,29 @@ def import_mushaf_task(quran_data, user_id):
         surah_objs = []
         for surah_data in quran_data["surahs"]:
             surah_objs.append(Surah(
-                creator_id=user.id,
+                creator_id=uid,
                 mushaf=mushaf,
                 number=surah_data["number"],
                 name=surah_data["name"],
                 period=surah_data["period"]
             ))
-        Surah.objects.bulk_create(surah_objs)
-        surahs_by_number = {s.number: s for s in mushaf.surahs.all()}
-        ayah_objs = []
-        for surah_data in quran_data["surahs"]:
-            surah = surahs_by_number[surah_data["number"]]
-            for ayah in surah_data["ayahs"]:
-                # Calculate length from words if available
-                length = 0
-                if "words" in ayah:
-                    text = ' '.join(word["text"] for word in ayah["words"])
-                    length = len(text)
-                
-                ayah_objs.append(Ayah(
-                    creator_id=user.id,
-                    surah=surah,
-                    number=ayah["number"],
-                    sajdah=ayah["sajdah"],
-                    is_bismillah=ayah["is_bismillah"],
-                    bismillah_text=ayah["bismillah_text"],
-                    length=length,
-                ))
-        Ayah.objects.bulk_create(ayah_objs)
-        ayahs_by_surah_and_number = {(a.surah.number, a.number): a for a in Ayah.objects.filter(surah__mushaf=mushaf)}
-        word_objs = []
-        for surah_data in quran_data["surahs"]:
-            for ayah in surah_data["ayahs"]:
-                ayah_obj = ayahs_by_surah_and_number[(surah_data["number"], ayah["number"])]
-                for word in ayah["words"]:
-                    word_objs.append(Word(ayah=ayah_obj, text=word["text"], creator_id=user.id))
-        Word.objects.bulk_create(word_objs)
+        created_surahs = Surah.objects.bulk_create(surah_objs, batch_size=settings.QURAN_BULK_BATCH_SIZE)
+        # PostgreSQL returns primary keys from bulk_create, so the created
+        # instances can be used directly; other backends need a re-select
+        if not connection.features.can_return_rows_from_bulk_insert:
+            created_surahs = mushaf.surahs.all()
+        surahs_by_number = {s.number: s for s in created_surahs}
+        _bulk_create_iter(Ayah, _iter_ayahs(quran_data, surahs_by_number, uid))
+        ayah_id_by_sn = dict(
+            ((surah_number, number), ayah_id)
+            for surah_number, number, ayah_id in Ayah.objects.filter(surah__mushaf=mushaf)
+            .values_list("surah__number", "number", "id")
+            .iterator(chunk_size=5000)
+        )
+        if settings.QURAN_USE_COPY and connection.vendor == 'postgresql':
+            _copy_words(_iter_words(quran_data, ayah_id_by_sn, uid))
+        else:
+            _bulk_create_iter(Word, _iter_words(quran_data, ayah_id_by_sn, uid))
     # Send notification to user
     Notification.objects.create(
         user=user,
@@ -83,10 +175,11 @@ def import_translation_task(translation_data, user_id):
     User = get_user_model()
     user = User.objects.get(id=user_id)
     with transaction.atomic():
+        uid = user.id
         translator, _ = User.objects.get_or_create(username=translation_data["translator_username"])
         mushaf = Mushaf.objects.get(short_name=translation_data["mushaf"])
         translation = Translation.objects.create(
-            creator_id=user.id,
+            creator_id=uid,
             mushaf_id=mushaf.id,
             translator_id=translator.id,
             source=translation_data["source"],
@@ -94,33 +187,14 @@ def import_translation_task(translation_data, user_id):
             language=translation_data["language"],
         )
         # Build a lookup for Ayah objects of this mushaf keyed by (surah_number, ayah_number)
-        ayah_lookup = {
-            (a.surah.number, a.number): a.id
-            for a in Ayah.objects.filter(surah__mushaf=mushaf).only("id", "number", "surah__number").select_related("surah")
-        }
-
-        ayah_translations = []
-        # Root-level bismillah text (if provided) – used as default for all ayahs
-        default_bismillah = translation_data.get("bismillah_text")
-
-        for surah_data in translation_data["surahs"]:
-            surah_number = surah_data["number"]
-            for ayah_data in surah_data["ayah_translations"]:
-                ayah_number = ayah_data["number"]
-                ayah_id = ayah_lookup.get((surah_number, ayah_number))
-                if ayah_id is None:
-                    # Skip if corresponding ayah not found (data mismatch)
-                    continue
-                ayah_translations.append(
-                    AyahTranslation(
-                        creator_id=user.id,
-                        translation_id=translation.id,
-                        ayah_id=ayah_id,
-                        text=ayah_data["text"],
-                        bismillah=ayah_data.get("bismillah_text") or default_bismillah,
-                    )
-                )
-        AyahTranslation.objects.bulk_create(ayah_translations)
+        ayah_lookup = dict(
+            ((surah_number, number), ayah_id)
+            for surah_number, number, ayah_id in Ayah.objects.filter(surah__mushaf=mushaf)
+            .values_list("surah__number", "number", "id")
+            .iterator(chunk_size=5000)
+        )
+
+        _bulk_create_iter(AyahTranslation, _iter_ayah_translations(translation_data, ayah_lookup, translation.id, uid))
     # Send notification to user
     Notification.objects.create(
         user=user,
@@ -134,127 +208,228 @@ def import_translation_task(translation_data, user_id):
     )
     return f'Translation {translation.uuid} imported successfully.'
 
-@shared_task(serializer="pickle")
-def generate_recitation_surah_timestamps_task(recitation, surah, file_obj):
-    from quran.models import RecitationSurah, RecitationSurahTimestamp, Word
-    
-    # Get or create the RecitationSurah association
-    recitation_surah, created = RecitationSurah.objects.get_or_create(
+def _sec_to_time(seconds):
+    """Convert an offset in seconds into a datetime.time."""
+    microseconds = int(round(seconds * 1_000_000))
+    hours, rest = divmod(microseconds, 3_600_000_000)
+    minutes, rest = divmod(rest, 60_000_000)
+    secs, microseconds = divmod(rest, 1_000_000)
+    return time(hours, minutes, secs, microseconds)
+
+def _should_retry(exc):
+    """Whether a failed alignment request is worth retrying as a new task run.
+
+    Only failures where upstream never got the request (connect errors) or
+    answered with a real 5xx are retried. Timeouts, 504s and mid-response
+    disconnects are not, since upstream may still be working on the request;
+    neither are RetryErrors, which the session adapter already retried, or
+    client errors, which will not go away.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.exceptions.RetryError):
+        return False
+    if isinstance(exc, requests.exceptions.HTTPError):
+        response = exc.response
+        return response is not None and response.status_code >= 500 and response.status_code != 504
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        # requests wraps urllib3's error, possibly inside a MaxRetryError
+        reason = exc.args[0] if exc.args else None
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        return isinstance(reason, NewConnectionError)
+    return False
+
+class AlignmentSkipped(Exception):
+    """Raised when a timestamps run has nothing to do for its recitation surah."""
+
+# Notification description for each outcome of the timestamps task
+_NOTIFY_DESCRIPTIONS = {
+    Notification.MESSAGE_TYPE_SUCCESS: 'Recitation timestamps generated',
+    Notification.MESSAGE_TYPE_WARNING: 'Recitation timestamps not generated',
+    Notification.MESSAGE_TYPE_FAILED: 'Failed to generate recitation timestamps',
+}
+
+def _notify(user, message_type, resource_uuid, message):
+    """Send the user a recitation timestamps notification, if there is a user."""
+    if not user:
+        return
+    Notification.objects.create(
+        user=user,
+        resource_controller="recitations",
+        resource_action="",
+        resource_uuid=resource_uuid,
+        status=Notification.STATUS_NOTHING,
+        description=_NOTIFY_DESCRIPTIONS[message_type],
+        message=message,
+        message_type=message_type
+    )
+
+@contextmanager
+def _recitation_surah_lock(recitation_surah):
+    """Hold a session-level advisory lock on a RecitationSurah.
+
+    Yields False if another session already holds it. The lock is released
+    on exit. Advisory locks are PostgreSQL only, so other backends always
+    get the lock.
+    """
+    if connection.vendor != 'postgresql':
+        yield True
+        return
+    # Single signed bigint key, hashed from a namespaced id so it cannot
+    # collide with other advisory lock users
+    digest = hashlib.blake2b(f'{TIMESTAMPS_LOCK_NAMESPACE}:{recitation_surah.pk}'.encode(), digest_size=8).digest()
+    key = int.from_bytes(digest, 'big', signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s::bigint)", [key])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s::bigint)", [key])
+
+def _match_alignment(words_by_text, alignment_data):
+    """Match force-alignment words to ayah words by text.
+
+    words_by_text maps each word text to a deque of (position, word id) in
+    surah order; matched entries are popped from it. Yields
+    (word id, start time, end time) for every matched alignment word,
+    keeping left-to-right order. Unmatched alignment words are skipped.
+    """
+    word_idx = 0
+    for word_data in alignment_data:
+        # Find the next matching word in ayah words, keeping left-to-right order
+        bucket = words_by_text.get(word_data['text'])
+        while bucket and bucket[0][0] < word_idx:
+            bucket.popleft()
+        if bucket:
+            i, word_id = bucket.popleft()
+            end_time = _sec_to_time(word_data['end']) if word_data.get('end') else None
+            yield word_id, _sec_to_time(word_data['start']), end_time
+            word_idx = i + 1
+
+def _is_valid_alignment(alignment_data):
+    """Whether alignment_data looks like a forced alignment result."""
+    return isinstance(alignment_data, list) and all(
+        isinstance(word_data, dict) and 'text' in word_data and 'start' in word_data
+        for word_data in alignment_data
+    )
+
+def _get_alignment(file_obj, audio_url, text):
+    """Return the forced alignment of text against the audio at audio_url.
+
+    Alignment is deterministic for the same audio and text, so results are
+    kept in the "alignment" cache. The cache is only an optimization: any
+    error reading or writing it is treated as a miss.
+    """
+    text_hash = hashlib.sha1(text.encode()).hexdigest()
+    cache_key = 'align:' + hashlib.sha256(f'{file_obj.s3_uuid}|{text_hash}|ar'.encode()).hexdigest()
+    alignment_cache = caches['alignment']
+    try:
+        alignment_data = alignment_cache.get(cache_key)
+    except Exception:
+        alignment_data = None
+    if _is_valid_alignment(alignment_data):
+        return alignment_data
+
+    headers = {}
+    if settings.FORCED_ALIGNMENT_SECRET_KEY:
+        headers['Authorization'] = settings.FORCED_ALIGNMENT_SECRET_KEY
+    align_response = _session.post(
+        f'{settings.FORCED_ALIGNMENT_API_URL}/align',
+        json={
+            'mp3_url': audio_url,
+            'text': text,
+            'language': 'ar'
+        },
+        headers=headers if headers else None,
+        timeout=(5, settings.FORCED_ALIGNMENT_READ_TIMEOUT)
+    )
+    align_response.raise_for_status()
+    alignment_data = align_response.json()
+    # Never cache a malformed response, or it would be replayed on every re-run
+    if not _is_valid_alignment(alignment_data):
+        raise ValueError('unexpected response from the forced alignment API')
+    try:
+        alignment_cache.set(cache_key, alignment_data)
+    except Exception:
+        pass
+    return alignment_data
+
+def _run_alignment(recitation_surah, file_obj, audio_url, words_by_text, text):
+    """Align the surah text to its audio and store the word timestamps.
+
+    words_by_text is the index described in _match_alignment.
+
+    Returns the number of timestamps created. Raises AlignmentSkipped when
+    another run is aligning this recitation surah or its timestamps already
+    exist.
+    """
+    # Lock this recitation/surah so a duplicate delivery of the task skips
+    # instead of aligning again. No transaction is open during the
+    # alignment request; only the insert below is atomic.
+    with _recitation_surah_lock(recitation_surah) as acquired:
+        if not acquired:
+            raise AlignmentSkipped('timestamps are already being generated by another run')
+        if recitation_surah.timestamps.exists():
+            raise AlignmentSkipped('timestamps already exist for this surah')
+        alignment_data = _get_alignment(file_obj, audio_url, text)
+        ts_objs = [
+            RecitationSurahTimestamp(
+                recitation_surah=recitation_surah,
+                start_time=start_time,
+                end_time=end_time,
+                word_id=word_id
+            )
+            for word_id, start_time, end_time in _match_alignment(words_by_text, alignment_data)
+        ]
+        with transaction.atomic():
+            RecitationSurahTimestamp.objects.bulk_create(ts_objs, batch_size=settings.QURAN_BULK_BATCH_SIZE)
+    return len(ts_objs)
+
+@shared_task(bind=True, serializer="pickle", max_retries=3)
+def generate_recitation_surah_timestamps_task(self, recitation, surah, file_obj):
+    # Get or create the RecitationSurah association; file is a required
+    # field, so an existing row always already has one attached
+    recitation_surah, _ = RecitationSurah.objects.get_or_create(
         recitation=recitation,
         surah=surah,
         defaults={"file": file_obj}
     )
-    
-    # If it already existed but had no file, attach the file
-    if not created and not recitation_surah.file_id:
-        recitation_surah.file = file_obj
-        recitation_surah.save(update_fields=["file"])
-    
+
     # Construct the audio URL using s3_uuid
     audio_url = file_obj.get_absolute_url()
 
-    # Get all words in the surah, ordered by ayah number and id (creation order)
-    words = list(Word.objects.filter(ayah__surah=surah).order_by('ayah__number', 'id'))
-    text = ' '.join([w.text for w in words])
+    # Get (id, text) of all words in the surah, ordered by ayah number and id (creation order),
+    # building the text to align and an index of words by text in one pass
+    words_by_text = defaultdict(deque)
+    parts = []
+    word_rows = Word.objects.filter(ayah__surah=surah).order_by('ayah__number', 'id').values_list('id', 'text')
+    for i, (word_id, word_text) in enumerate(word_rows.iterator(chunk_size=5000)):
+        words_by_text[word_text].append((i, word_id))
+        parts.append(word_text)
+    text = ' '.join(parts)
     user = getattr(recitation, 'creator', None)
+    recitation_uuid = getattr(recitation, 'uuid', None)
+    error = None
     try:
-        if audio_url and text:
-            try:
-                headers = {}
-                if getattr(settings, 'FORCED_ALIGNMENT_SECRET_KEY', None):
-                    if settings.FORCED_ALIGNMENT_SECRET_KEY:
-                        headers['Authorization'] = settings.FORCED_ALIGNMENT_SECRET_KEY
-                align_response = requests.post(
-                    f'{settings.FORCED_ALIGNMENT_API_URL}/align',
-                    json={
-                        'mp3_url': audio_url,
-                        'text': text,
-                        'language': 'ar'
-                    },
-                    headers=headers if headers else None,
-                    timeout=120
-                )
-                align_response.raise_for_status()
-                alignment_data = align_response.json()
-                from datetime import datetime, timedelta
-                # Match force-alignment words to ayah words by text
-                word_idx = 0
-                for word_data in alignment_data:
-                    # Ensure 'word' key exists in word_data
-                    # Find the next matching word in ayah words
-                    while word_idx < len(words) and words[word_idx].text != word_data['text']:
-                        word_idx += 1
-                    if word_idx < len(words):
-                        word_obj = words[word_idx]
-                        start_time = (datetime.min + timedelta(seconds=word_data['start'])).time()
-                        end_time = (datetime.min + timedelta(seconds=word_data['end'])).time() if word_data.get('end') else None
-                        # Ensure we have a RecitationSurah for this recitation/surah combo
-                        # recitation_surah, _ = RecitationSurah.objects.get_or_create(
-                        #     recitation=recitation,
-                        #     surah=surah,
-                        #     defaults={"file_id": getattr(recitation, "file_id", None)},
-                        # )
-
-                        RecitationSurahTimestamp.objects.create(
-                            recitation_surah=recitation_surah,
-                            start_time=start_time,
-                            end_time=end_time,
-                            word=word_obj
-                        )
-                        word_idx += 1
-                    # If not matched, skip this word_data
-                # Send notification to user if available
-                if user:
-                    Notification.objects.create(
-                        user=user,
-                        resource_controller="recitations",
-                        resource_action="",
-                        resource_uuid=getattr(recitation, 'uuid', None),
-                        status=Notification.STATUS_NOTHING,
-                        description=f'Recitation timestamps generated',
-                        message=f'Recitation timestamps generated for recitation {getattr(recitation, "uuid", "")}.',
-                        message_type=Notification.MESSAGE_TYPE_SUCCESS
-                    )
-                return 'timestamps generated'
-            except Exception as e:
-                # Send failure notification to user if available
-                if user:
-                    Notification.objects.create(
-                        user=user,
-                        resource_controller="quran.generate_recitation_timestamps",
-                        resource_action="",
-                        resource_uuid=getattr(recitation, 'uuid', None),
-                        status=Notification.STATUS_NOTHING,
-                        description=f'Failed to generate recitation timestamps',
-                        message=f'Failed to generate recitation timestamps for recitation {getattr(recitation, "uuid", "")}: {str(e)}',
-                        message_type=Notification.MESSAGE_TYPE_FAILED
-                    )
-                return f'Failed to generate timestamps: {str(e)}'
-        else:
-            # Send failure notification to user if available
-            if user:
-                Notification.objects.create(
-                    user=user,
-                    resource_controller="quran.tasks.generate_recitation_timestamps",
-                    resource_action="",
-                    resource_uuid=getattr(recitation, 'uuid', None),
-                    status=Notification.STATUS_NOTHING,
-                    description=f'Failed to generate recitation timestamps',
-                    message=f'Failed to generate recitation timestamps for recitation {getattr(recitation, "uuid", "")}: missing audio_url or text',
-                    message_type=Notification.MESSAGE_TYPE_FAILED
-                )
-            return 'Failed: missing audio_url or text'
+        if not (audio_url and text):
+            raise ValueError('missing audio_url or text')
+        _run_alignment(recitation_surah, file_obj, audio_url, words_by_text, text)
+    except AlignmentSkipped as e:
+        _notify(user, Notification.MESSAGE_TYPE_WARNING, recitation_uuid, f'Recitation timestamps not generated for recitation {recitation_uuid or ""}: {str(e)}')
+        return f'Skipped: {str(e)}'
+    except requests.exceptions.RequestException as e:
+        # Let Celery retry transient upstream failures later
+        if _should_retry(e) and self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+        error = e
     except Exception as e:
-        # Send failure notification to user if available
-        if user:
-            Notification.objects.create(
-                user=user,
-                resource_controller="quran.tasks.generate_recitation_timestamps",
-                resource_action="",
-                resource_uuid=getattr(recitation, 'uuid', None),
-                status=Notification.STATUS_NOTHING,
-                description=f'Failed to generate recitation timestamps',
-                message=f'Failed to generate recitation timestamps for recitation {getattr(recitation, "uuid", "")}: {str(e)}',
-                message_type=Notification.MESSAGE_TYPE_FAILED
-            )
-        return f'Failed to generate timestamps: {str(e)}'
+        error = e
+    if error is not None:
+        _notify(user, Notification.MESSAGE_TYPE_FAILED, recitation_uuid, f'Failed to generate recitation timestamps for recitation {recitation_uuid or ""}: {str(error)}')
+        return f'Failed to generate timestamps: {str(error)}'
+    _notify(user, Notification.MESSAGE_TYPE_SUCCESS, recitation_uuid, f'Recitation timestamps generated for recitation {recitation_uuid or ""}.')
+    return 'timestamps generated'
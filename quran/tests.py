@@ -1,3 +1,257 @@
-from django.test import TestCase
+import math
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+import requests
+from celery.exceptions import Retry
+from django.test import SimpleTestCase, override_settings
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from core.models import Notification
+from quran.models import Surah
+from quran.tasks import (
+    AlignmentSkipped,
+    _bulk_create_iter,
+    _copy_escape,
+    _get_alignment,
+    _iter_ayah_translations,
+    _iter_ayahs,
+    _iter_words,
+    _match_alignment,
+    _sec_to_time,
+    _should_retry,
+    generate_recitation_surah_timestamps_task,
+)
+
+
+def _index(words):
+    """Build the text -> deque of (position, word id) index used for matching."""
+    words_by_text = defaultdict(deque)
+    for i, (word_id, word_text) in enumerate(words):
+        words_by_text[word_text].append((i, word_id))
+    return words_by_text
+
+
+def _http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(response=response)
+
+
+class MatchAlignmentTests(SimpleTestCase):
+    def match(self, words, tokens):
+        alignment_data = [{'text': t, 'start': i, 'end': i + 0.5} for i, t in enumerate(tokens)]
+        return [word_id for word_id, _, _ in _match_alignment(_index(words), alignment_data)]
+
+    def test_matches_words_in_order(self):
+        self.assertEqual(self.match([(1, 'a'), (2, 'b'), (3, 'c')], ['a', 'b', 'c']), [1, 2, 3])
+
+    def test_repeated_texts_match_successive_words(self):
+        words = [(1, 'a'), (2, 'b'), (3, 'a'), (4, 'a')]
+        self.assertEqual(self.match(words, ['a', 'b', 'a', 'a']), [1, 2, 3, 4])
+
+    def test_unmatched_token_does_not_stop_later_matches(self):
+        words = [(1, 'a'), (2, 'b'), (3, 'c')]
+        self.assertEqual(self.match(words, ['a', 'noise', 'b', 'c']), [1, 2, 3])
+
+    def test_never_matches_a_word_before_the_last_match(self):
+        words = [(1, 'a'), (2, 'b'), (3, 'a')]
+        # 'b' matches position 1, so the following 'a' must skip position 0
+        self.assertEqual(self.match(words, ['b', 'a', 'a']), [2, 3])
+
+    def test_token_with_no_remaining_word_is_skipped(self):
+        self.assertEqual(self.match([(1, 'a')], ['a', 'a']), [1])
+
+    def test_missing_end_gives_no_end_time(self):
+        matches = list(_match_alignment(_index([(1, 'a')]), [{'text': 'a', 'start': 1.25}]))
+        self.assertEqual(matches, [(1, _sec_to_time(1.25), None)])
+
+
+class SecToTimeTests(SimpleTestCase):
+    def test_matches_datetime_arithmetic(self):
+        for seconds in [0, 0.000001, 0.1 + 0.2, 1.5, 59.9999995, 61.234567, 3599.999999, 3725.0000004, 12.3456785]:
+            with self.subTest(seconds=seconds):
+                expected = (datetime.min + timedelta(seconds=seconds)).time()
+                self.assertEqual(_sec_to_time(seconds), expected)
+
+
+class CopyEscapeTests(SimpleTestCase):
+    def test_escapes_copy_special_characters(self):
+        self.assertEqual(_copy_escape('a\tb\nc\\d\re'), 'a\\tb\\nc\\\\d\\re')
+
+    def test_leaves_plain_text_unchanged(self):
+        self.assertEqual(_copy_escape('بِسْمِ ٱللَّهِ'), 'بِسْمِ ٱللَّهِ')
+
+
+class AyahLengthTests(SimpleTestCase):
+    def test_length_equals_joined_word_text(self):
+        ayahs = [
+            {"number": 1, "words": [{"text": "بِسْمِ"}, {"text": "ٱللَّهِ"}, {"text": "ٱلرَّحْمَٰنِ"}]},
+            {"number": 2, "words": [{"text": "ٱلْحَمْدُ"}]},
+            {"number": 3, "words": []},
+            {"number": 4},
+        ]
+        for ayah in ayahs:
+            ayah.update(sajdah=None, is_bismillah=False, bismillah_text=None)
+        quran_data = {"surahs": [{"number": 1, "ayahs": ayahs}]}
+        built = list(_iter_ayahs(quran_data, {1: Surah(number=1)}, uid=1))
+        expected = [len(' '.join(w["text"] for w in a.get("words", []))) for a in ayahs]
+        self.assertEqual([a.length for a in built], expected)
+
+
+class BulkCreateIterTests(SimpleTestCase):
+    @override_settings(QURAN_BULK_BATCH_SIZE=3)
+    def test_sends_one_bulk_create_per_batch(self):
+        for n in [0, 1, 3, 7, 9]:
+            with self.subTest(n=n):
+                model = mock.Mock()
+                _bulk_create_iter(model, iter(range(n)))
+                calls = model.objects.bulk_create.call_args_list
+                self.assertEqual(len(calls), math.ceil(n / 3))
+                self.assertTrue(all(len(c.args[0]) <= 3 for c in calls))
+                self.assertEqual([obj for c in calls for obj in c.args[0]], list(range(n)))
+
+
+class ImportRowIteratorTests(SimpleTestCase):
+    def test_iter_words_uses_the_ayah_id_lookup(self):
+        quran_data = {"surahs": [{"number": 1, "ayahs": [
+            {"number": 1, "words": [{"text": "a"}, {"text": "b"}]},
+            {"number": 2, "words": [{"text": "c"}]},
+        ]}]}
+        words = list(_iter_words(quran_data, {(1, 1): 10, (1, 2): 11}, uid=5))
+        self.assertEqual([(w.ayah_id, w.text, w.creator_id) for w in words], [(10, "a", 5), (10, "b", 5), (11, "c", 5)])
+
+    def test_iter_ayah_translations_skips_missing_ayahs_and_defaults_bismillah(self):
+        translation_data = {
+            "bismillah_text": "root bismillah",
+            "surahs": [{"number": 1, "ayah_translations": [
+                {"number": 1, "text": "first", "bismillah_text": "own bismillah"},
+                {"number": 2, "text": "second"},
+                {"number": 99, "text": "no such ayah"},
+            ]}],
+        }
+        built = list(_iter_ayah_translations(translation_data, {(1, 1): 10, (1, 2): 11}, translation_id=3, uid=5))
+        self.assertEqual(
+            [(t.ayah_id, t.text, t.bismillah, t.translation_id, t.creator_id) for t in built],
+            [(10, "first", "own bismillah", 3, 5), (11, "second", "root bismillah", 3, 5)],
+        )
+
+
+class ShouldRetryTests(SimpleTestCase):
+    def test_retries_connect_failures_and_server_errors(self):
+        new_connection_error = NewConnectionError(None, 'Connection refused')
+        for exc in [
+            requests.exceptions.ConnectTimeout(),
+            requests.exceptions.ConnectionError(new_connection_error),
+            requests.exceptions.ConnectionError(MaxRetryError(None, '/align', new_connection_error)),
+            _http_error(500),
+            _http_error(502),
+        ]:
+            with self.subTest(exc=exc):
+                self.assertTrue(_should_retry(exc))
+
+    def test_does_not_retry_requests_upstream_may_still_be_processing(self):
+        for exc in [
+            requests.exceptions.ReadTimeout(),
+            requests.exceptions.RetryError(MaxRetryError(None, '/align')),
+            requests.exceptions.ConnectionError(ProtocolError('Connection aborted.')),
+            requests.exceptions.ConnectionError(MaxRetryError(None, '/align', ProtocolError('Connection aborted.'))),
+            _http_error(504),
+        ]:
+            with self.subTest(exc=exc):
+                self.assertFalse(_should_retry(exc))
+
+    def test_does_not_retry_client_or_non_http_errors(self):
+        for exc in [_http_error(400), _http_error(404), ValueError('bad alignment data')]:
+            with self.subTest(exc=exc):
+                self.assertFalse(_should_retry(exc))
+
+
+@mock.patch('quran.tasks._notify')
+@mock.patch('quran.tasks._run_alignment')
+@mock.patch('quran.tasks.Word')
+@mock.patch('quran.tasks.RecitationSurah')
+class GenerateTimestampsTaskTests(SimpleTestCase):
+    def run_task(self, mock_recitation_surah, mock_word):
+        mock_recitation_surah.objects.get_or_create.return_value = (mock.Mock(), False)
+        rows = mock_word.objects.filter.return_value.order_by.return_value.values_list.return_value
+        rows.iterator.return_value = [(1, 'a'), (2, 'b')]
+        file_obj = mock.Mock()
+        file_obj.get_absolute_url.return_value = 'http://example.com/recitations/a.mp3'
+        return generate_recitation_surah_timestamps_task(mock.Mock(), mock.Mock(), file_obj)
+
+    def test_success_notifies_once(self, mock_recitation_surah, mock_word, mock_run, mock_notify):
+        mock_run.return_value = 2
+        self.assertEqual(self.run_task(mock_recitation_surah, mock_word), 'timestamps generated')
+        mock_notify.assert_called_once()
+        self.assertEqual(mock_notify.call_args.args[1], Notification.MESSAGE_TYPE_SUCCESS)
+
+    def test_skipped_run_notifies_reason(self, mock_recitation_surah, mock_word, mock_run, mock_notify):
+        for reason in ['timestamps are already being generated by another run', 'timestamps already exist for this surah']:
+            with self.subTest(reason=reason):
+                mock_notify.reset_mock()
+                mock_run.side_effect = AlignmentSkipped(reason)
+                self.assertEqual(self.run_task(mock_recitation_surah, mock_word), f'Skipped: {reason}')
+                mock_notify.assert_called_once()
+                self.assertEqual(mock_notify.call_args.args[1], Notification.MESSAGE_TYPE_WARNING)
+                self.assertIn(reason, mock_notify.call_args.args[3])
+
+    def test_retryable_error_is_retried_without_notifying(self, mock_recitation_surah, mock_word, mock_run, mock_notify):
+        mock_run.side_effect = _http_error(503)
+        with mock.patch.object(generate_recitation_surah_timestamps_task, 'retry', side_effect=Retry()) as mock_retry:
+            with self.assertRaises(Retry):
+                self.run_task(mock_recitation_surah, mock_word)
+        mock_retry.assert_called_once()
+        mock_notify.assert_not_called()
+
+    def test_non_retryable_errors_notify_failure(self, mock_recitation_surah, mock_word, mock_run, mock_notify):
+        for exc in [
+            requests.exceptions.ReadTimeout(),
+            requests.exceptions.RetryError(),
+            _http_error(504),
+            _http_error(400),
+            ValueError('bad'),
+        ]:
+            with self.subTest(exc=exc):
+                mock_notify.reset_mock()
+                mock_run.side_effect = exc
+                with mock.patch.object(generate_recitation_surah_timestamps_task, 'retry') as mock_retry:
+                    result = self.run_task(mock_recitation_surah, mock_word)
+                mock_retry.assert_not_called()
+                self.assertTrue(result.startswith('Failed to generate timestamps'))
+                mock_notify.assert_called_once()
+                self.assertEqual(mock_notify.call_args.args[1], Notification.MESSAGE_TYPE_FAILED)
+
+
+@mock.patch('quran.tasks._session')
+@mock.patch('quran.tasks.caches')
+class GetAlignmentTests(SimpleTestCase):
+    alignment = [{'text': 'a', 'start': 0.0, 'end': 0.5}]
+
+    def get_alignment(self):
+        file_obj = mock.Mock(s3_uuid='00000000-0000-0000-0000-000000000000')
+        return _get_alignment(file_obj, 'http://example.com/recitations/a.mp3', 'a')
+
+    def test_cache_hit_skips_the_request(self, mock_caches, mock_session):
+        mock_caches.__getitem__.return_value.get.return_value = self.alignment
+        self.assertEqual(self.get_alignment(), self.alignment)
+        mock_session.post.assert_not_called()
+
+    def test_cache_errors_are_treated_as_a_miss(self, mock_caches, mock_session):
+        alignment_cache = mock_caches.__getitem__.return_value
+        alignment_cache.get.side_effect = Exception('relation "alignment_cache" does not exist')
+        alignment_cache.set.side_effect = Exception('cache unavailable')
+        mock_session.post.return_value.json.return_value = self.alignment
+        self.assertEqual(self.get_alignment(), self.alignment)
+        mock_session.post.assert_called_once()
+
+    def test_malformed_response_is_not_cached(self, mock_caches, mock_session):
+        alignment_cache = mock_caches.__getitem__.return_value
+        alignment_cache.get.return_value = None
+        for response in [{'error': 'oops'}, [{'start': 0.0}], ['a']]:
+            with self.subTest(response=response):
+                mock_session.post.return_value.json.return_value = response
+                with self.assertRaises(ValueError):
+                    self.get_alignment()
+        alignment_cache.set.assert_not_called()